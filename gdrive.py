@@ -3,6 +3,7 @@
 """
 GDrive CLI Module
 Command-line interface for Google Drive with Git-like commands
+Requires Python 3.11+
 """
 
 import os
@@ -10,13 +11,18 @@ import sys
 import json
 import sqlite3
 import re
-from datetime import datetime
-from google.auth.transport.requests import Request
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaFileUpload, MediaIoBaseDownload
-import io
+import socket
+import random
+import hashlib
+import functools
+import contextlib
+import tempfile
+import mimetypes
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+# Google client libraries, aiohttp and asyncio are imported inside the methods
+# that need them so local-only commands don't pay their import cost
 
 SCOPES = ['https://www.googleapis.com/auth/drive']
 GDRIVE_DIR = '.gdrive'
@@ -24,22 +30,68 @@ CONFIG_FILE = os.path.join(GDRIVE_DIR, 'config.json')
 TOKEN_FILE = os.path.join(GDRIVE_DIR, 'token.json')
 CREDENTIALS_FILE = 'credentials.json'
 SYNC_DB_FILE = os.path.join(GDRIVE_DIR, 'sync.db')
+DAEMON_SOCKET = os.path.join(GDRIVE_DIR, 'daemon.sock')
+DAEMON_CONNECT_TIMEOUT = 2  # Seconds to wait for the daemon before running in-process
+DRIVE_FILES_URL = 'https://www.googleapis.com/drive/v3/files'
+DRIVE_UPLOAD_URL = 'https://www.googleapis.com/upload/drive/v3/files'
+BATCH_SIZE = 100  # Drive's per-request limit for the batch endpoint
+MULTIPART_UPLOAD_LIMIT = 5 * 1024 * 1024  # Larger files need a resumable session
+TRANSFER_RETRIES = 5
+TRANSFER_CONNECT_TIMEOUT = 30
+TRANSFER_READ_TIMEOUT = 60  # Max seconds without data; transfers have no overall limit
+RATE_LIMIT_REASONS = {'rateLimitExceeded', 'userRateLimitExceeded'}
+HASH_BUFFER_SIZE = 1024 * 1024
+TOKEN_REFRESH_MARGIN = timedelta(seconds=60)
+USER_AGENT = 'gdrive-cli (gzip)'
+LIST_PAGE_SIZE = 1000  # Maximum page size for files.list
+STREAM_CHUNK_SIZE = 1024 * 1024
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+FILE_ID_PATTERN = re.compile(r'(?:/file/d/|id=|/folders/)([a-zA-Z0-9_-]+)')
+
+# The umask can only be read by setting it, which would briefly change it for
+# every thread in the process, so read it once at import
+UMASK = os.umask(0)
+os.umask(UMASK)
 
 class GDriveError(Exception):
     """Custom exception for GDrive operations"""
     pass
 
+class TransientTransferError(GDriveError):
+    """Rate-limit or server error that is worth retrying after a backoff"""
+    pass
+
+# Names of GDriveCLI methods that the `gdrive serve` daemon may run
+DAEMON_METHODS = set()
+
+def daemon_method(func):
+    """Decorator to forward a GDriveCLI method to the daemon when one is running"""
+    DAEMON_METHODS.add(func.__name__)
+    
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if self._daemon:
+            return self._daemon.call(func.__name__, args, kwargs)
+        return func(self, *args, **kwargs)
+    return wrapper
+
 class GDriveCLI:
-    def __init__(self):
-        self.service = None
+    def __init__(self, use_daemon=True):
+        self._creds = None
+        self._daemon = None
         self.config = {}
         self.conn = None
         
-        # Initialize if .gdrive directory exists
+        # Initialize if .gdrive directory exists; authentication is deferred
+        # until a command first talks to Drive
         if os.path.exists(GDRIVE_DIR):
             self.load_config()
-            self.authenticate()
-            self.connect_db()
+            
+            # Hand work to a running `gdrive serve` daemon, else run in-process
+            if use_daemon:
+                self._daemon = DaemonClient.connect()
+            if not self._daemon:
+                self.connect_db()
     
     def init_workspace(self, folder_name=None):
         """Initialize GDrive workspace in current directory"""
@@ -89,6 +141,10 @@ class GDriveCLI:
     
     def authenticate(self):
         """Authenticate with Google Drive API"""
+        from google.auth.transport.requests import Request
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import InstalledAppFlow
+        
         if not os.path.exists(CREDENTIALS_FILE):
             raise GDriveError(f"{CREDENTIALS_FILE} not found")
         
@@ -106,11 +162,52 @@ class GDriveCLI:
             with open(TOKEN_FILE, 'w') as token:
                 token.write(creds.to_json())
         
-        self.service = build('drive', 'v3', credentials=creds)
+        self._creds = creds
+    
+    @property
+    def creds(self):
+        """OAuth credentials, authenticating on first use"""
+        if self._creds is None:
+            self.authenticate()
+        return self._creds
+    
+    @functools.cached_property
+    def service(self):
+        """Drive API service, built on first use"""
+        from googleapiclient.discovery import build
+        
+        # The bundled discovery document is used by default; skipping the
+        # discovery cache also skips its autodetect on every build()
+        return build('drive', 'v3', http=self._http, cache_discovery=False)
+    
+    @functools.cached_property
+    def _http(self):
+        """Shared authorized HTTP transport for the Drive service"""
+        from google_auth_httplib2 import AuthorizedHttp
+        from googleapiclient.http import build_http, set_user_agent
+        
+        # build_http() keeps 308 out of httplib2's redirect codes, which
+        # resumable uploads rely on
+        http = AuthorizedHttp(self.creds, http=build_http())
+        
+        # httplib2 already sends Accept-Encoding: gzip; Google APIs only
+        # compress responses when the User-Agent also contains "gzip"
+        return set_user_agent(http, USER_AGENT)
     
     def connect_db(self):
         """Connect to sync tracking database"""
-        self.conn = sqlite3.connect(SYNC_DB_FILE)
+        # `gdrive serve` shares this connection across handler threads,
+        # serializing access with its own lock
+        self.conn = sqlite3.connect(SYNC_DB_FILE, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        
+        # WAL lets readers proceed during writes and avoids an fsync per commit
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA temp_store=MEMORY')
+        self.conn.execute('PRAGMA mmap_size=268435456')
+        self.conn.execute('PRAGMA cache_size=-65536')
+        
         self.init_sync_tables()
     
     def init_sync_tables(self):
@@ -125,14 +222,21 @@ class GDriveCLI:
                 remote_name TEXT,
                 last_synced TEXT,
                 local_modified TEXT,
-                remote_modified TEXT
+                remote_modified TEXT,
+                remote_md5 TEXT
             )
         ''')
         
+        # Add the checksum column to databases created before it existed
+        columns = {row[1] for row in cursor.execute('PRAGMA table_info(sync_files)')}
+        if 'remote_md5' not in columns:
+            cursor.execute('ALTER TABLE sync_files ADD COLUMN remote_md5 TEXT')
+        
         self.conn.commit()
     
     # ===== GOOGLE DRIVE API OPERATIONS =====
     
+    @daemon_method
     def list_drive_files(self, folder_id=None, name_filter=None, file_type=None):
         """List files in Google Drive"""
         query_parts = ["trashed=false"]
@@ -155,14 +259,22 @@ class GDriveCLI:
         
         query = " and ".join(query_parts)
         
-        results = self.service.files().list(
-            q=query,
-            pageSize=100,
-            fields="files(id, name, mimeType, size, modifiedTime, parents)"
-        ).execute()
-        
-        return results.get('files', [])
+        files = []
+        page_token = None
+        while True:
+            results = self.service.files().list(
+                q=query,
+                pageSize=LIST_PAGE_SIZE,
+                pageToken=page_token,
+                fields="nextPageToken, files(id, name, mimeType, size, modifiedTime, md5Checksum)"
+            ).execute()
+            
+            files.extend(results.get('files', []))
+            page_token = results.get('nextPageToken')
+            if not page_token:
+                return files
     
+    @daemon_method
     def get_file_content(self, file_id):
         """Get file content as text (for cat command)"""
         try:
@@ -182,6 +294,7 @@ class GDriveCLI:
             except Exception as e:
                 raise GDriveError(f"Cannot read file content: {e}")
     
+    @daemon_method
     def create_remote_folder(self, folder_name):
         """Create a folder in Google Drive"""
         file_metadata = {
@@ -196,8 +309,11 @@ class GDriveCLI:
         
         return folder.get('id')
     
+    @daemon_method
     def upload_file(self, local_path, remote_name=None, folder_id=None):
         """Upload a local file to Google Drive"""
+        from googleapiclient.http import MediaFileUpload
+        
         if not os.path.exists(local_path):
             raise GDriveError(f"Local file not found: {local_path}")
         
@@ -215,64 +331,207 @@ class GDriveCLI:
         file = self.service.files().create(
             body=file_metadata,
             media_body=media,
-            fields='id, name, modifiedTime'
+            fields='id, name, modifiedTime, md5Checksum'
         ).execute()
         
         return file
     
+    @daemon_method
+    def update_file(self, file_id, local_path, remote_name=None):
+        """Replace the content of an existing Drive file with a local file"""
+        from googleapiclient.http import MediaFileUpload
+        
+        if not os.path.exists(local_path):
+            raise GDriveError(f"Local file not found: {local_path}")
+        
+        file_metadata = {'name': remote_name} if remote_name else {}
+        media = MediaFileUpload(local_path, resumable=True)
+        
+        return self.service.files().update(
+            fileId=file_id,
+            body=file_metadata,
+            media_body=media,
+            fields='id, name, modifiedTime, md5Checksum'
+        ).execute()
+    
+    @daemon_method
     def download_file(self, file_id, local_path):
         """Download a file from Google Drive"""
-        request = self.service.files().get_media(fileId=file_id)
-        file_io = io.BytesIO()
-        downloader = MediaIoBaseDownload(file_io, request)
+        from googleapiclient.http import MediaIoBaseDownload
         
-        done = False
-        while not done:
-            status, done = downloader.next_chunk()
+        request = self.service.files().get_media(fileId=file_id)
         
-        # Save to local file
-        os.makedirs(os.path.dirname(local_path), exist_ok=True)
-        with open(local_path, 'wb') as f:
-            f.write(file_io.getvalue())
+        # Stream each chunk straight to disk, moving the file into place once complete
+        with atomic_write(local_path) as f:
+            downloader = MediaIoBaseDownload(f, request)
+            
+            done = False
+            while not done:
+                status, done = downloader.next_chunk()
         
+        fsync_dirs([local_path])
         return True
     
+    @daemon_method
+    def download_many(self, pairs):
+        """Download several files concurrently, given (file_id, local_path) pairs
+        
+        API only: no gdrive command calls this yet.
+        """
+        local_paths = self._run_async(self._async_client.download_many(pairs))
+        
+        # One directory fsync per batch instead of one per file
+        fsync_dirs(local_paths)
+        return local_paths
+    
+    @daemon_method
+    def upload_many(self, local_paths, folder_id=None):
+        """Upload several local files concurrently
+        
+        API only: no gdrive command calls this yet.
+        """
+        for local_path in local_paths:
+            if not os.path.exists(local_path):
+                raise GDriveError(f"Local file not found: {local_path}")
+        
+        if not folder_id and self.config.get('remote_folder_id'):
+            folder_id = self.config['remote_folder_id']
+        
+        return self._run_async(self._async_client.upload_many(local_paths, folder_id))
+    
+    @functools.cached_property
+    def _async_client(self):
+        """Transfer client kept across batches so its auth header is reused"""
+        return AsyncDriveClient(self.creds)
+    
+    def _run_async(self, coro):
+        """Run a transfer batch, surfacing the first failure as a GDriveError"""
+        import asyncio
+        
+        try:
+            return asyncio.run(coro)
+        except ExceptionGroup as eg:
+            raise GDriveError(str(eg.exceptions[0])) from eg
+    
+    @daemon_method
     def delete_file(self, file_id):
         """Delete a file from Google Drive"""
         self.service.files().delete(fileId=file_id).execute()
         return True
     
+    @daemon_method
     def get_file_metadata(self, file_id):
         """Get file metadata from Google Drive"""
         return self.service.files().get(
             fileId=file_id,
-            fields='id, name, mimeType, size, modifiedTime, parents'
+            fields='id, name, mimeType, size, modifiedTime, md5Checksum, parents, trashed'
         ).execute()
     
+    def batch(self, requests):
+        """Execute metadata requests through the batch endpoint, 100 per HTTP call
+        
+        Media uploads/downloads are not supported by the batch endpoint.
+        Returns the responses in request order.
+        """
+        responses = [None] * len(requests)
+        errors = []
+        
+        def callback(request_id, response, exception):
+            if exception is not None:
+                errors.append(exception)
+            else:
+                responses[int(request_id)] = response
+        
+        for start in range(0, len(requests), BATCH_SIZE):
+            batch = self.service.new_batch_http_request(callback=callback)
+            for i, request in enumerate(requests[start:start + BATCH_SIZE], start):
+                batch.add(request, request_id=str(i))
+            batch.execute()
+        
+        if errors:
+            raise GDriveError(f"Batch request failed: {errors[0]}")
+        
+        return responses
+    
+    @daemon_method
+    def delete_files(self, file_ids):
+        """Delete several files from Google Drive"""
+        self.batch([self.service.files().delete(fileId=file_id) for file_id in file_ids])
+        return True
+    
+    @daemon_method
+    def get_file_metadata_many(self, file_ids):
+        """Get metadata for several files from Google Drive"""
+        return self.batch([
+            self.service.files().get(
+                fileId=file_id,
+                fields='id, name, mimeType, size, modifiedTime, md5Checksum, parents'
+            )
+            for file_id in file_ids
+        ])
+    
     # ===== SYNC OPERATIONS =====
     
-    def track_file(self, local_path, remote_id, remote_name):
+    @daemon_method
+    def track_file(self, local_path, remote_id, remote_name, md5_checksum=None):
         """Track a local file's relationship to remote file"""
-        cursor = self.conn.cursor()
-        
-        local_modified = datetime.fromtimestamp(os.path.getmtime(local_path)).isoformat()
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO sync_files 
-            (local_path, remote_id, remote_name, last_synced, local_modified)
-            VALUES (?, ?, ?, datetime('now'), ?)
-        ''', (local_path, remote_id, remote_name, local_modified))
+        self.track_files([(local_path, remote_id, remote_name, md5_checksum)])
+    
+    @daemon_method
+    def track_files(self, rows):
+        """Track several (local_path, remote_id, remote_name, md5_checksum) rows in one transaction"""
+        records = []
+        for local_path, remote_id, remote_name, md5_checksum in rows:
+            local_modified = datetime.fromtimestamp(os.path.getmtime(local_path)).isoformat()
+            records.append((local_path, remote_id, remote_name, local_modified, md5_checksum))
+        
+        with self.conn:
+            self.conn.executemany('''
+                INSERT OR REPLACE INTO sync_files 
+                (local_path, remote_id, remote_name, last_synced, local_modified, remote_md5)
+                VALUES (?, ?, ?, datetime('now'), ?, ?)
+            ''', records)
+    
+    @daemon_method
+    def get_sync_state(self, tracked):
+        """Compare a tracked file with its Drive copy: 'missing', 'unchanged' or 'changed'"""
+        from googleapiclient.errors import HttpError
         
-        self.conn.commit()
+        try:
+            metadata = self.get_file_metadata(tracked['remote_id'])
+        except HttpError as e:
+            if e.resp.status == 404:
+                return 'missing'
+            raise
+        
+        # files().get still returns trashed files, checksum and all
+        if metadata.get('trashed'):
+            return 'missing'
+        
+        remote_md5 = metadata.get('md5Checksum')
+        
+        # Skip rehashing when neither Drive's checksum nor the local mtime
+        # moved since the last sync
+        local_modified = datetime.fromtimestamp(
+            os.path.getmtime(tracked['local_path'])
+        ).isoformat()
+        if (remote_md5 and remote_md5 == tracked['remote_md5']
+                and local_modified == tracked['local_modified']):
+            return 'unchanged'
+        
+        if self.get_file_hash(tracked['local_path']) == remote_md5:
+            return 'unchanged'
+        return 'changed'
     
+    @daemon_method
     def get_tracked_files(self):
         """Get all tracked file relationships"""
         cursor = self.conn.cursor()
         cursor.execute('SELECT * FROM sync_files')
         
-        columns = [desc[0] for desc in cursor.description]
-        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        return [dict(row) for row in cursor.fetchall()]
     
+    @daemon_method
     def get_file_status(self, local_path):
         """Get sync status of a local file"""
         cursor = self.conn.cursor()
@@ -285,9 +544,9 @@ class GDriveCLI:
         if not result:
             return None
         
-        columns = [desc[0] for desc in cursor.description]
-        return dict(zip(columns, result))
+        return dict(result)
     
+    @daemon_method
     def untrack_file(self, local_path):
         """Stop tracking a file"""
         cursor = self.conn.cursor()
@@ -303,19 +562,25 @@ class GDriveCLI:
             return sharing_link_or_id
         
         # Extract from sharing link
-        patterns = [
-            r'/file/d/([a-zA-Z0-9-_]+)',
-            r'id=([a-zA-Z0-9-_]+)',
-            r'/folders/([a-zA-Z0-9-_]+)'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, sharing_link_or_id)
-            if match:
-                return match.group(1)
+        match = FILE_ID_PATTERN.search(sharing_link_or_id)
+        if match:
+            return match.group(1)
         
         raise GDriveError(f"Could not extract file ID from: {sharing_link_or_id}")
     
+    def get_file_hash(self, local_path):
+        """Get MD5 hex digest of a local file (comparable to Drive's md5Checksum)"""
+        with open(local_path, 'rb', buffering=HASH_BUFFER_SIZE) as f:
+            return hashlib.file_digest(f, 'md5').hexdigest()
+    
+    def hash_many(self, local_paths):
+        """Hash several local files in parallel, returning digests in input order
+        
+        API only: no gdrive command calls this yet.
+        """
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            return list(executor.map(self.get_file_hash, local_paths))
+    
     def format_file_size(self, size_bytes):
         """Format file size in human readable format"""
         if not size_bytes:
@@ -323,19 +588,236 @@ class GDriveCLI:
         
         try:
             size = int(size_bytes)
-            for unit in ['B', 'KB', 'MB', 'GB']:
-                if size < 1024:
-                    return f"{size:.1f}{unit}"
-                size /= 1024
-            return f"{size:.1f}TB"
         except (ValueError, TypeError):
             return "N/A"
+        
+        if size < 0:
+            return "N/A"
+        
+        # Each unit step is 2**10, so the bit length picks the unit directly
+        unit_index = min(max(size.bit_length() - 1, 0) // 10, len(SIZE_UNITS) - 1)
+        return f"{size / (1 << (10 * unit_index)):.1f}{SIZE_UNITS[unit_index]}"
     
     def close(self):
         """Close database connection"""
+        if self._daemon:
+            self._daemon.close()
         if self.conn:
             self.conn.close()
 
+class AsyncDriveClient:
+    """Concurrent Drive transfers over the REST API using aiohttp"""
+    
+    def __init__(self, creds, max_connections=16):
+        self.creds = creds
+        self.max_connections = max_connections
+        self.session = None
+        self._auth_header = None
+        self._auth_token = None
+        self._auth_lock = None
+    
+    async def _ensure_fresh(self):
+        """Get the cached Authorization header, refreshing the token shortly before it expires"""
+        import asyncio
+        
+        async with self._auth_lock:
+            expiry = self.creds.expiry
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            if expiry and expiry - now < TOKEN_REFRESH_MARGIN:
+                from google.auth.transport.requests import Request
+                
+                # The refresh is a blocking HTTP call, so keep it off the event loop
+                await asyncio.to_thread(self.creds.refresh, Request())
+            
+            # The Drive service shares these credentials and may refresh them too
+            if self._auth_token != self.creds.token:
+                self._auth_token = self.creds.token
+                self._auth_header = {'Authorization': f'Bearer {self._auth_token}'}
+            return self._auth_header
+    
+    async def _check_response(self, response, action):
+        """Raise for a failed response, marking rate limits and server errors as transient"""
+        if response.status in (200, 201):
+            return
+        
+        message = f"{action} failed: HTTP {response.status}"
+        if response.status == 429 or response.status >= 500:
+            raise TransientTransferError(message)
+        
+        if response.status == 403:
+            try:
+                error = (await response.json(content_type=None))['error']
+                reasons = {e.get('reason') for e in error.get('errors', [])}
+            except (ValueError, KeyError, TypeError, AttributeError):
+                reasons = set()
+            if reasons & RATE_LIMIT_REASONS:
+                raise TransientTransferError(message)
+        
+        raise GDriveError(message)
+    
+    async def _with_backoff(self, transfer, *args):
+        """Run a transfer, retrying transient failures with exponential backoff"""
+        import asyncio
+        import aiohttp
+        
+        for attempt in range(TRANSFER_RETRIES):
+            try:
+                return await transfer(*args)
+            except (TransientTransferError, aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == TRANSFER_RETRIES - 1:
+                    raise
+                await asyncio.sleep(2 ** attempt + random.random())
+    
+    async def _download(self, file_id, local_path):
+        """Stream a single Drive file to disk"""
+        import asyncio
+        
+        async with self.session.get(
+            f"{DRIVE_FILES_URL}/{file_id}",
+            params={'alt': 'media'},
+            headers=await self._ensure_fresh()
+        ) as response:
+            await self._check_response(response, f"Download of {file_id}")
+            
+            # Disk writes and the closing fsync can block for seconds on large
+            # files, so they run in worker threads instead of stalling the batch
+            writer = atomic_write(local_path)
+            f = await asyncio.to_thread(writer.__enter__)
+            try:
+                async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                    await asyncio.to_thread(f.write, chunk)
+            except BaseException:
+                await asyncio.to_thread(writer.__exit__, *sys.exc_info())
+                raise
+            await asyncio.to_thread(writer.__exit__, None, None, None)
+        
+        return local_path
+    
+    async def _upload(self, local_path, folder_id=None):
+        """Upload a single local file, using a resumable session above the multipart limit"""
+        import aiohttp
+        
+        file_metadata = {'name': os.path.basename(local_path)}
+        if folder_id:
+            file_metadata['parents'] = [folder_id]
+        fields = 'id, name, modifiedTime, md5Checksum'
+        # Match the type MediaFileUpload guesses for upload_file
+        mime_type = mimetypes.guess_type(local_path)[0] or 'application/octet-stream'
+        
+        if os.path.getsize(local_path) <= MULTIPART_UPLOAD_LIMIT:
+            with open(local_path, 'rb') as f:
+                with aiohttp.MultipartWriter('related') as body:
+                    body.append_json(file_metadata)
+                    body.append(f, {'Content-Type': mime_type})
+                
+                async with self.session.post(
+                    DRIVE_UPLOAD_URL,
+                    params={'uploadType': 'multipart', 'fields': fields},
+                    data=body,
+                    headers=await self._ensure_fresh()
+                ) as response:
+                    await self._check_response(response, f"Upload of {local_path}")
+                    return await response.json()
+        
+        # Open a resumable session, then send the whole file to it in one request
+        async with self.session.post(
+            DRIVE_UPLOAD_URL,
+            params={'uploadType': 'resumable', 'fields': fields},
+            json=file_metadata,
+            headers={**await self._ensure_fresh(), 'X-Upload-Content-Type': mime_type}
+        ) as response:
+            await self._check_response(response, f"Upload of {local_path}")
+            session_url = response.headers['Location']
+        
+        with open(local_path, 'rb') as f:
+            async with self.session.put(
+                session_url,
+                data=f,
+                headers=await self._ensure_fresh()
+            ) as response:
+                await self._check_response(response, f"Upload of {local_path}")
+                return await response.json()
+    
+    async def download_many(self, pairs):
+        """Download (file_id, local_path) pairs over one shared session"""
+        return await self._run_batch(
+            lambda pair: self._with_backoff(self._download, *pair), pairs)
+    
+    async def upload_many(self, local_paths, folder_id=None):
+        """Upload local files over one shared session"""
+        return await self._run_batch(
+            lambda local_path: self._with_backoff(self._upload, local_path, folder_id),
+            local_paths)
+    
+    async def _run_batch(self, coro_factory, items):
+        """Run coro_factory(item) for every item concurrently over one shared session"""
+        import asyncio
+        import aiohttp
+        
+        # asyncio locks belong to one event loop, and each batch runs its own
+        self._auth_lock = asyncio.Lock()
+        connector = aiohttp.TCPConnector(limit=self.max_connections)
+        timeout = aiohttp.ClientTimeout(total=None, sock_connect=TRANSFER_CONNECT_TIMEOUT,
+                                        sock_read=TRANSFER_READ_TIMEOUT)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as self.session:
+            async with asyncio.TaskGroup() as tg:
+                tasks = [tg.create_task(coro_factory(item)) for item in items]
+        
+        return [task.result() for task in tasks]
+
+class DaemonClient:
+    """Client for the `gdrive serve` daemon, speaking one JSON object per line"""
+    
+    def __init__(self, sock):
+        self.sock = sock
+        self.stream = sock.makefile('rwb')
+    
+    @classmethod
+    def connect(cls):
+        """Connect to the workspace daemon, or return None if none is running"""
+        if not os.path.exists(DAEMON_SOCKET):
+            return None
+        
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(DAEMON_CONNECT_TIMEOUT)
+        try:
+            sock.connect(DAEMON_SOCKET)
+        except OSError:
+            # Stale socket left behind by a daemon that is no longer running
+            sock.close()
+            return None
+        
+        # A daemon that doesn't answer promptly is treated as not running
+        client = cls(sock)
+        try:
+            client.call('ping', (), {})
+        except (OSError, ValueError, GDriveError):
+            client.close()
+            return None
+        
+        sock.settimeout(None)
+        return client
+    
+    def call(self, method, args, kwargs):
+        """Run a GDriveCLI method in the daemon and return its result"""
+        request = {'method': method, 'args': list(args), 'kwargs': kwargs}
+        self.stream.write(json.dumps(request).encode() + b'\n')
+        self.stream.flush()
+        
+        line = self.stream.readline()
+        if not line:
+            raise GDriveError("gdrive daemon closed the connection")
+        
+        response = json.loads(line)
+        if 'error' in response:
+            raise GDriveError(response['error'])
+        return response['result']
+    
+    def close(self):
+        """Close the connection to the daemon"""
+        self.stream.close()
+        self.sock.close()
+
 # ===== UTILITY FUNCTIONS =====
 
 def error_exit(program_name, message):
@@ -347,6 +829,41 @@ def get_program_name():
     """Extract program name from sys.argv[0]"""
     return os.path.basename(sys.argv[0])
 
+@contextlib.contextmanager
+def atomic_write(local_path):
+    """Write to a temp file beside local_path, then fsync and rename it into place
+    
+    A crash mid-write leaves only the temp file, never a truncated local_path.
+    Call fsync_dirs() afterwards to make the rename itself durable.
+    """
+    directory = os.path.dirname(local_path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory,
+                                    prefix=f".{os.path.basename(local_path)}.",
+                                    suffix='.tmp')
+    try:
+        # mkstemp creates the file 0600; give it the usual umask-based mode
+        os.fchmod(fd, 0o666 & ~UMASK)
+        
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, local_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def fsync_dirs(paths):
+    """Persist the directory entries for paths, syncing each directory once"""
+    for directory in {os.path.dirname(os.path.abspath(path)) for path in paths}:
+        fd = os.open(directory, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
 def requires_workspace(func):
     """Decorator to ensure commands run in a gdrive workspace"""
     def wrapper(*args, **kwargs):